@@ -1,18 +1,36 @@
+import concurrent.futures
 import contextlib
 import dis
 import io
+import json
 import re
+import string
 import sys
 from collections.abc import Callable
 from typing import Literal
 
 import graphviz
 import streamlit as st
+import streamlit.components.v1 as components
 from code_editor import code_editor
 from streamlit.delta_generator import DeltaGenerator
 
 import astdot
+from templates import template_names as code_template_names
 from templates import templates as code_templates
+from templates import templates_by_name as code_templates_by_name
+
+
+_MATERIAL_ICON_RE = re.compile(r':material/[a-zA-Z0-9_]+:')
+_PY311 = sys.version_info >= (3, 11)
+_PY313 = sys.version_info >= (3, 13)
+
+if _PY313:
+    _DIS_OPTIONS = ('show_caches', 'adaptive', 'show_offsets')
+elif _PY311:
+    _DIS_OPTIONS = ('show_caches', 'adaptive')
+else:
+    _DIS_OPTIONS = ()
 
 
 def is_stlite():
@@ -20,8 +38,7 @@ def is_stlite():
 
 
 def remove_material_icons(text: str) -> str:
-    pattern = r':material/[a-zA-Z0-9_]+:'
-    return re.sub(pattern, '', text)
+    return _MATERIAL_ICON_RE.sub('', text)
 
 
 PLATFORM: Literal['STLITE', 'STREAMLIT'] = (
@@ -46,8 +63,61 @@ ICONS = {
     'vars': ':material/input:',
     'tune': ':material/tune:',
     'dot': ':material/schema:',
+    'render': ':material/refresh:',
+}
+
+IMAGE_MIME_TYPES = {
+    'svg': 'image/svg+xml',
+    'png': 'image/png',
 }
 
+BROWSER_BUTTON_COLORS = {
+    'light': {
+        'color': '#31333F',
+        'background': 'white',
+        'border': 'rgba(49, 51, 63, 0.2)',
+    },
+    'dark': {
+        'color': '#FAFAFA',
+        'background': 'black',
+        'border': 'rgba(250, 250, 250, 0.2)',
+    },
+}
+BROWSER_SVG_DOWNLOAD_HTML = string.Template("""
+<style>
+  body {
+    margin: 0;
+    background: $background;
+  }
+  button {
+    width: 100%;
+    padding: 0.4rem 0.75rem;
+    border: 1px solid $border;
+    border-radius: 0.5rem;
+    background: $background;
+    font-family: "Source Sans Pro", sans-serif;
+    font-size: 1rem;
+    color: $color;
+    cursor: pointer;
+  }
+</style>
+<button id="svg">SVG</button>
+<script type="module">
+  import { Graphviz } from
+    'https://cdn.jsdelivr.net/npm/@hpcc-js/wasm-graphviz@1.6.1/dist/index.js';
+  const dot = $dot;
+  document.getElementById('svg').addEventListener('click', async () => {
+    const graphviz = await Graphviz.load();
+    const svg = graphviz.layout(dot, 'svg', 'dot');
+    const link = document.createElement('a');
+    link.href = URL.createObjectURL(new Blob([svg], { type: 'image/svg+xml' }));
+    link.download = 'ast.svg';
+    link.click();
+    setTimeout(() => URL.revokeObjectURL(link.href));
+  });
+</script>
+""")
+
 if 'code_template_name' not in STATE:
     STATE['code_template_name'] = code_templates[0].name
 if 'code_editor_template' not in STATE:
@@ -84,8 +154,6 @@ def prepare_ui_settings():
         value=STATE.get('ui_show_headers', True),
         key='ui_show_headers',
     )
-    if 'ui_theme_current' not in STATE:
-        STATE['ui_theme_current'] = 'light'
     st.radio(
         'change theme',
         options=['light', 'dark'],
@@ -97,15 +165,13 @@ def prepare_ui_settings():
         'sections will be reset to their default values.'
     )
 
-    if STATE['ui_theme'] == 'dark':
-        st._config.set_option('theme.base', 'dark')  # noqa: SLF001
-        st._config.set_option('theme.backgroundColor', 'black')  # noqa: SLF001
-    else:
-        st._config.set_option('theme.base', 'light')  # noqa: SLF001
-        st._config.set_option('theme.backgroundColor', 'white')  # noqa: SLF001
-
-    if STATE['ui_theme_current'] != STATE['ui_theme']:
-        STATE['ui_theme_current'] = STATE['ui_theme']
+    if st._config.get_option('theme.base') != STATE['ui_theme']:  # noqa: SLF001
+        if STATE['ui_theme'] == 'dark':
+            st._config.set_option('theme.base', 'dark')  # noqa: SLF001
+            st._config.set_option('theme.backgroundColor', 'black')  # noqa: SLF001
+        else:
+            st._config.set_option('theme.base', 'light')  # noqa: SLF001
+            st._config.set_option('theme.backgroundColor', 'white')  # noqa: SLF001
         if PLATFORM == 'STREAMLIT':
             st.rerun()
 
@@ -179,7 +245,7 @@ def prepare_ast_settings():
         options=[-1, 0, 1, 2],
         index=0,
         key='code_ast_optimize',
-        disabled=not sys.version_info >= (3, 13),
+        disabled=not _PY313,
     )
     st.text_area(
         label='skip edge names',
@@ -345,6 +411,16 @@ def prepare_output_settings():
             value=STATE.get('code_output_wrap_lines', True),
             key='code_output_wrap_lines',
         )
+        st.checkbox(
+            label='cache output',
+            value=STATE.get('code_output_cache', False),
+            key='code_output_cache',
+            help=(
+                'Reuse the output of unchanged code between reruns. '
+                'Only for deterministic code: cached output is shared '
+                'between sessions and kept for up to 10 minutes.'
+            ),
+        )
         st.checkbox(
             label='show user variables',
             value=STATE.get('code_output_show_var', True),
@@ -376,20 +452,20 @@ def prepare_bytecode_settings():
             label='show caches (≥3.11 only)',
             value=STATE.get('code_bytecode_show_caches', False),
             key='code_bytecode_show_caches',
-            disabled=not sys.version_info >= (3, 11),
+            disabled=not _PY311,
         )
         st.checkbox(
             label='adaptive (≥3.11 only)',
             value=STATE.get('code_bytecode_adaptive', False),
             key='code_bytecode_adaptive',
-            disabled=not sys.version_info >= (3, 11),
+            disabled=not _PY311,
         )
 
         st.checkbox(
             label='show offsets (≥3.13 only)',
             value=STATE.get('code_bytecode_show_offsets', False),
             key='code_bytecode_show_offsets',
-            disabled=not sys.version_info >= (3, 13),
+            disabled=not _PY313,
         )
         st.caption('Style options')
         theme_index = 0 if STATE['ui_theme'] == 'light' else 1
@@ -420,9 +496,7 @@ def prepare_bytecode_settings():
 
 def load_code_template():
     selected_name = STATE['code_template_name']
-    template = next(
-        (t for t in code_templates if t.name == selected_name), None
-    )
+    template = code_templates_by_name.get(selected_name)
     if template:
         STATE['code_editor_template'] = template.code.strip()
 
@@ -443,10 +517,9 @@ def display_card(
 
 
 def display_code_editor():
-    options = [template.name for template in code_templates]
     st.selectbox(
         label='Template',
-        options=options,
+        options=code_template_names,
         key='code_template_name',
         on_change=load_code_template,
     )
@@ -485,9 +558,82 @@ def display_code_editor():
     )
 
 
-def skip_names(name, value):
-    skip_set = {n.strip() for n in STATE['code_ast_skip_edge_names'].split(',')}
-    return astdot.skip(name, value) or name in skip_set
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_source_to_dot(
+    source: str,
+    style: str,
+    mode: str,
+    optimize: int,
+    skip_edge_names: str,
+) -> str:
+    skip_set = {n.strip() for n in skip_edge_names.split(',')}
+
+    def skip_names(name, value):
+        return astdot.skip(name, value) or name in skip_set
+
+    return astdot.source_to_dot(
+        source=source,
+        skip=skip_names,
+        mode=mode,
+        optimize=optimize,
+        style=style,
+    )
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _graphviz_source(dot: str) -> graphviz.Source:
+    return graphviz.Source(dot)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _render_pipe(dot: str, fmt: str) -> bytes:
+    return _graphviz_source(dot).pipe(format=fmt, engine='dot', encoding=None)
+
+
+@st.cache_resource(show_spinner=False)
+def _graphviz_pool() -> concurrent.futures.ThreadPoolExecutor:
+    return concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+
+def request_image_render(dot: str):
+    STATE['code_ast_images_dot'] = dot
+
+
+def display_image_downloads(containers: dict[str, DeltaGenerator], dot: str):
+    if STATE.get('code_ast_images_dot') != dot:
+        for fmt, container in containers.items():
+            container.button(
+                label=fmt.upper(),
+                help='Render SVG and PNG for download',
+                on_click=request_image_render,
+                args=(dot,),
+                use_container_width=True,
+                icon=ICONS['render'],
+            )
+        return
+    futures = {
+        _graphviz_pool().submit(_render_pipe, dot, fmt): fmt
+        for fmt in containers
+    }
+    for future in concurrent.futures.as_completed(futures):
+        fmt = futures[future]
+        containers[fmt].download_button(
+            label=fmt.upper(),
+            data=future.result(),
+            file_name=f'ast.{fmt}',
+            mime=IMAGE_MIME_TYPES[fmt],
+            use_container_width=True,
+            icon=ICONS[fmt],
+        )
+
+
+def display_browser_svg_download(dot: str):
+    dot_js = json.dumps(dot).replace('</', '<\\/')
+    html = BROWSER_SVG_DOWNLOAD_HTML.substitute(
+        dot=dot_js,
+        **BROWSER_BUTTON_COLORS[STATE['ui_theme']],
+    )
+    components.html(html, height=44)
 
 
 def display_ast_viewer():
@@ -521,12 +667,12 @@ def display_ast_viewer():
     )
 
     try:
-        dot = astdot.source_to_dot(
+        dot = _cached_source_to_dot(
             source=STATE['code_editor']['text'],
-            skip=skip_names,
+            style=style,
             mode=STATE['code_ast_mode'],
             optimize=STATE['code_ast_optimize'],
-            style=style,
+            skip_edge_names=STATE['code_ast_skip_edge_names'],
         )
     except SyntaxError as error:
         st.caption('Exception raised.')
@@ -538,10 +684,7 @@ def display_ast_viewer():
         )
 
         if PLATFORM == 'STREAMLIT':
-            src = graphviz.Source(dot)
-            svg_bytes = src.pipe(format='svg')
-            png_bytes = src.pipe(format='png')
-            col1, col2, col3 = STATE['download_container'].columns(3)
+            col1, *image_cols = STATE['download_container'].columns(3)
             col1.download_button(
                 label='DOT',
                 data=dot,
@@ -550,26 +693,14 @@ def display_ast_viewer():
                 use_container_width=True,
                 icon=ICONS['dot'],
             )
-            col2.download_button(
-                label='SVG',
-                data=svg_bytes,
-                file_name='ast.svg',
-                mime='image/svg+xml',
-                use_container_width=True,
-                icon=ICONS['svg'],
-            )
-            col3.download_button(
-                label='PNG',
-                data=png_bytes,
-                file_name='ast.png',
-                mime='image/png',
-                use_container_width=True,
-                icon=ICONS['png'],
+            display_image_downloads(
+                containers=dict(zip(IMAGE_MIME_TYPES, image_cols, strict=True)),
+                dot=dot,
             )
         else:
             with STATE['download_container'].container():
                 st.info(
-                    'Currently, `png` and `svg` downloads are only available '
+                    'Currently, `png` downloads are only available '
                     'in the local environment.'
                 )
                 st.download_button(
@@ -579,6 +710,7 @@ def display_ast_viewer():
                     mime='text/plain',
                     use_container_width=True,
                 )
+                display_browser_svg_download(dot)
 
         if STATE['code_ast_show_dot']:
             st.code(
@@ -587,19 +719,53 @@ def display_ast_viewer():
             )
 
 
-def display_code_output():
-    if not STATE['code_editor'] or not STATE['code_editor']['text']:
-        st.warning('The code is missing or the render failed.')
-        return
-    code = STATE['code_editor']['text']
+def _json_default(o: object) -> str | list:
+    return list(o) if isinstance(o, set) else repr(o)
+
+
+def variables_to_json(variables: dict) -> tuple[str, str | None]:
+    try:
+        return json.dumps(variables, default=_json_default), None
+    except TypeError as error:
+        warning = (
+            'Warning: this data structure was not fully serializable as '
+            f'JSON due to one or more unexpected keys.  (Error was: {error})'
+        )
+        body = json.dumps(variables, skipkeys=True, default=_json_default)
+        return body, warning
+
+
+def exec_code(code: str) -> tuple[str, str, str | None]:
     exec_globals = {}
-    output = None
     with io.StringIO() as buf, contextlib.redirect_stdout(buf):
         try:
             exec(code, exec_globals)
         except Exception as e:
             print(f'Error: {e}')
         output = buf.getvalue()
+    exec_globals.pop('__builtins__', None)
+    variables = {
+        k: v for k, v in exec_globals.items() if not k.startswith('__')
+    }
+    if not variables:
+        return output, '', None
+    return output, *variables_to_json(variables)
+
+
+@st.cache_data(max_entries=32, ttl=600, show_spinner=False)
+def _cached_exec_output(code: str) -> tuple[str, str, str | None]:
+    return exec_code(code)
+
+
+def display_code_output():
+    if not STATE['code_editor'] or not STATE['code_editor']['text']:
+        st.warning('The code is missing or the render failed.')
+        return
+    code = STATE['code_editor']['text']
+    if STATE['code_output_cache']:
+        output, variables_json, variables_warning = _cached_exec_output(code)
+    else:
+        output, variables_json, variables_warning = exec_code(code)
     if PLATFORM == 'STREAMLIT':
         st.code(
             body=output,
@@ -618,57 +784,63 @@ def display_code_output():
         if STATE['ui_show_headers']:
             label_vars = f'{ICONS["vars"]} Variables'
             st.subheader(label_vars)
-        variables = {
-            k: v
-            for k, v in exec_globals.items()
-            if not k.startswith('__') and k != '__builtins__'
-        }
-        if variables:
-            st.json(variables)
+        if variables_warning:
+            st.warning(variables_warning)
+        if variables_json:
+            st.json(variables_json)
         else:
             st.write('No user variables.')
 
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def _cached_bytecode_text(
+    code: str,
+    depth: int | None,
+    show_caches: bool,
+    adaptive: bool,
+    show_offsets: bool,
+) -> str:
+    options = {
+        'show_caches': show_caches,
+        'adaptive': adaptive,
+        'show_offsets': show_offsets,
+    }
+    buf = io.StringIO()
+    dis.dis(
+        x=code,
+        file=buf,
+        depth=depth,
+        **{name: options[name] for name in _DIS_OPTIONS},
+    )
+    return buf.getvalue()
+
+
+def get_bytecode_text(code: str) -> str:
+    options = {
+        'depth': STATE['code_bytecode_depth']
+        if STATE['code_bytecode_use_depth']
+        else None,
+        'show_caches': STATE['code_bytecode_show_caches'],
+        'adaptive': STATE['code_bytecode_adaptive'],
+        'show_offsets': STATE['code_bytecode_show_offsets'],
+    }
+    key = (code, *options.values())
+    cached_key, bytecode_str = STATE.get('code_bytecode_text', (None, ''))
+    if cached_key != key:
+        bytecode_str = _cached_bytecode_text(code=code, **options)
+        STATE['code_bytecode_text'] = (key, bytecode_str)
+    return bytecode_str
+
+
 def display_code_bytecode():
     if not STATE['code_editor'] or not STATE['code_editor']['text']:
         st.warning('The code is missing or the render failed.')
         return
-    code = STATE['code_editor']['text']
-    buf = io.StringIO()
     try:
-        if sys.version_info >= (3, 13):
-            dis.dis(
-                x=code,
-                file=buf,
-                depth=STATE['code_bytecode_depth']
-                if STATE['code_bytecode_use_depth']
-                else None,
-                show_caches=STATE['code_bytecode_show_caches'],
-                adaptive=STATE['code_bytecode_adaptive'],
-                show_offsets=STATE['code_bytecode_show_offsets'],
-            )
-        elif sys.version_info >= (3, 11):
-            dis.dis(
-                x=code,
-                file=buf,
-                depth=STATE['code_bytecode_depth']
-                if STATE['code_bytecode_use_depth']
-                else None,
-                show_caches=STATE['code_bytecode_show_caches'],
-                adaptive=STATE['code_bytecode_adaptive'],
-            )
-        else:
-            dis.dis(
-                x=code,
-                file=buf,
-                depth=STATE['code_bytecode_depth']
-                if STATE['code_bytecode_use_depth']
-                else None,
-            )
+        bytecode_str = get_bytecode_text(STATE['code_editor']['text'])
     except SyntaxError as error:
         st.warning(f'SyntaxError: {error}')
     else:
-        bytecode_str = buf.getvalue()
         code_editor(
             code=bytecode_str,
             lang='sh',
@@ -758,7 +930,6 @@ def prepare_body():
             container=bytecode_tab,
             body=display_code_bytecode,
             label=bytecode_label,
-            show=STATE['code_bytecode_show'],
             show_header=False,
         )
 
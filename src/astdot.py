@@ -4,6 +4,8 @@ import sys
 from typing import Literal
 
 
+_PY313 = sys.version_info >= (3, 13)
+
 DEFAULT_FONT = 'Menlo'
 ALLOWED_FONTS = ['Menlo', 'Monaco', 'Helvetica', 'JetBrains Mono']
 
@@ -72,58 +74,68 @@ edge [
 """
 
 
-def graph_to_dot(graph, node_labels, edge_labels, style):
-    dot = [f'digraph G {{{style}']
-    for n in graph:
-        label = node_labels[n].replace('"', '\\"')
-        dot.append(f'{n} [label="{label}"]')
-    dot.extend(
-        f'{src} -> {dst} [label="{edge_labels[src, dst]}"]'
-        for src in graph
-        for dst in graph[src]
-    )
-    dot.append('}')
+def graph_to_dot(node_labels, edges, style):
+    n_nodes = len(node_labels)
+    dot = [None] * (n_nodes + len(edges) + 2)
+    dot[0] = f'digraph G {{{style}'
+    for n, label in enumerate(node_labels):
+        escaped = label.replace('"', '\\"') if '"' in label else label
+        dot[n + 1] = f'{n} [label="{escaped}"]'
+    i = n_nodes + 1
+    for src, dst, label in edges:
+        dot[i] = f'{src} -> {dst} [label="{label}"]'
+        i += 1
+    dot[i] = '}'
     return '\n'.join(dot)
 
 
 def skip(name, value):
-    return name != 'value' and value in ([], None)
+    return name != 'value' and (
+        value is None or (isinstance(value, list) and not value)
+    )
 
 
-def _to_dot_from_ast(root, skip, style):
-    def walk_fields(node_id, node):
-        args = []
-        for name, value in ast.iter_fields(node):
-            match value:
-                case _ if skip(name, value):
-                    pass
-                case ast.AST() | list():
-                    walk_node(node_id, value, f'.{name}')
-                case _:
-                    args.append(f'{name}: {value!r}')
-        return args
+_MISSING = object()
+_CHILD_TYPES = (ast.AST, list)
+_FIELDS_CACHE: dict[type, tuple[str, ...]] = {}
 
-    def walk_node(parent_id, node, edge_label):
-        node_id = len(graph)
-        graph[node_id] = []
-        if parent_id is not None:
-            graph[parent_id].append(node_id)
-            edge_labels[parent_id, node_id] = edge_label
-        match node:
-            case ast.AST():
-                args = [node.__class__.__name__, *walk_fields(node_id, node)]
-                node_labels[node_id] = '\\n'.join(args)
-            case list():
-                node_labels[node_id] = 'list'
-                for i, x in enumerate(node):
-                    walk_node(node_id, x, f'[{i}]')
 
+def _to_dot_from_ast(root, skip, style):
     if style is None:
         style = make_style()
 
-    graph, node_labels, edge_labels = {}, {}, {}
-    walk_node(None, root, '')
-    return graph_to_dot(graph, node_labels, edge_labels, style)
+    node_labels, edges = [], []
+    stack = [(None, root, '')]
+    pop, push = stack.pop, stack.extend
+    add_label, add_edge = node_labels.append, edges.append
+    get_fields = _FIELDS_CACHE.get
+    while stack:
+        parent_id, node, edge_label = pop()
+        node_id = len(node_labels)
+        if parent_id is not None:
+            add_edge((parent_id, node_id, edge_label))
+        if type(node) is list:
+            add_label('list')
+            children = [(node_id, x, f'[{i}]') for i, x in enumerate(node)]
+        else:
+            cls = type(node)
+            fields = get_fields(cls)
+            if fields is None:
+                fields = _FIELDS_CACHE[cls] = cls._fields
+            args = [cls.__name__]
+            children = []
+            for name in fields:
+                value = getattr(node, name, _MISSING)
+                if value is _MISSING or skip(name, value):
+                    continue
+                if isinstance(value, _CHILD_TYPES):
+                    children.append((node_id, value, f'.{name}'))
+                else:
+                    args.append(f'{name}: {value!r}')
+            add_label('\\n'.join(args))
+        push(reversed(children))
+
+    return graph_to_dot(node_labels, edges, style)
 
 
 def source_to_ast(
@@ -132,7 +144,7 @@ def source_to_ast(
     optimize: Literal[None, -1, 0, 1, 2] = None,
     mode: Literal['exec', 'eval', 'single'] = 'exec',
 ):
-    if optimize is None or sys.version_info < (3, 13):
+    if optimize is None or not _PY313:
         return ast.parse(source, mode=mode)
     return ast.parse(source, mode=mode, optimize=optimize)
 
@@ -92,3 +92,6 @@ def what_day(day):
 """,
     ),
 ]
+
+templates_by_name = {t.name: t for t in templates}
+template_names = tuple(templates_by_name)
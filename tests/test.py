@@ -4,13 +4,13 @@ from src import astdot
 def test():
     output = r"""
 digraph G {
-0 [label="Module" shape=box style="rounded, filled"]
-1 [label="list" shape=box style="rounded, filled"]
-2 [label="Expr" shape=box style="rounded, filled"]
-3 [label="BinOp" shape=box style="rounded, filled"]
-4 [label="Constant\nvalue: 2" shape=box style="rounded, filled"]
-5 [label="Add" shape=box style="rounded, filled"]
-6 [label="Constant\nvalue: 2" shape=box style="rounded, filled"]
+0 [label="Module"]
+1 [label="list"]
+2 [label="Expr"]
+3 [label="BinOp"]
+4 [label="Constant\nvalue: 2"]
+5 [label="Add"]
+6 [label="Constant\nvalue: 2"]
 0 -> 1 [label=".body"]
 1 -> 2 [label="[0]"]
 2 -> 3 [label=".value"]
@@ -20,3 +20,75 @@ digraph G {
 }
     """
     assert astdot.source_to_dot('2 + 2', style='').strip() == output.strip()
+
+
+def test_multiple_statements():
+    dot = astdot.source_to_dot('x = 1\ny = 2', style='').splitlines()
+    nodes = r"""
+0 [label="Module"]
+1 [label="list"]
+2 [label="Assign"]
+3 [label="list"]
+4 [label="Name\nid: 'x'"]
+5 [label="Store"]
+6 [label="Constant\nvalue: 1"]
+7 [label="Assign"]
+8 [label="list"]
+9 [label="Name\nid: 'y'"]
+10 [label="Store"]
+11 [label="Constant\nvalue: 2"]
+    """
+    assert [line for line in dot if '->' not in line][1:-1] == (
+        nodes.strip().splitlines()
+    )
+    assert [line for line in dot if line.startswith('1 ->')] == [
+        '1 -> 2 [label="[0]"]',
+        '1 -> 7 [label="[1]"]',
+    ]
+
+
+def test_edges_in_traversal_order():
+    dot = astdot.source_to_dot('x = 1\ny = 2', style='').splitlines()
+    edges = r"""
+0 -> 1 [label=".body"]
+1 -> 2 [label="[0]"]
+2 -> 3 [label=".targets"]
+3 -> 4 [label="[0]"]
+4 -> 5 [label=".ctx"]
+2 -> 6 [label=".value"]
+1 -> 7 [label="[1]"]
+7 -> 8 [label=".targets"]
+8 -> 9 [label="[0]"]
+9 -> 10 [label=".ctx"]
+7 -> 11 [label=".value"]
+    """
+    assert [line for line in dot if '->' in line] == edges.strip().splitlines()
+
+
+def test_label_quotes_escaped():
+    dot = astdot.source_to_dot("s = 'a\"b'", style='').splitlines()
+    assert r"""6 [label="Constant\nvalue: 'a\"b'"]""" in dot
+
+
+def test_custom_skip():
+    def skip(name, value):
+        return astdot.skip(name, value) or name == 'ctx'
+
+    output = r"""
+digraph G {
+0 [label="Module"]
+1 [label="list"]
+2 [label="Assign"]
+3 [label="list"]
+4 [label="Name\nid: 'x'"]
+5 [label="Name\nid: 'y'"]
+0 -> 1 [label=".body"]
+1 -> 2 [label="[0]"]
+2 -> 3 [label=".targets"]
+3 -> 4 [label="[0]"]
+2 -> 5 [label=".value"]
+}
+    """
+    assert astdot.source_to_dot('x = y', skip=skip, style='').strip() == (
+        output.strip()
+    )
@@ -0,0 +1,21 @@
+import sys
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).parents[1] / 'src'))
+
+import app
+
+
+def test_exec_code_non_string_keys():
+    output, variables_json, warning = app.exec_code('d = {(1, 2): 3}')
+    assert not output
+    assert variables_json == '{"d": {}}'
+    assert 'unexpected keys' in warning
+
+
+def test_exec_code_sets_as_lists():
+    output, variables_json, warning = app.exec_code('s = {1, 2}\nprint(s)')
+    assert output == '{1, 2}\n'
+    assert variables_json == '{"s": [1, 2]}'
+    assert warning is None